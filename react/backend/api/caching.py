@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from starlette.datastructures import MutableHeaders
+from .database import acached, aquery_to_dicts
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE = 30
+STALE_WHILE_REVALIDATE = 120
+VERSION_TTL = 10
+BODY_CACHE_MAXSIZE = 16
+
+_bodies: OrderedDict[str, bytes] = OrderedDict()
+
+# Concurrent requests on an expired version entry wait for one lookup instead of each running it
+_version_lock = asyncio.Lock()
+
+_TABLE_VERSIONS_QUERY = """
+    SELECT TABLE_NAME as table_name, DATE_PART(EPOCH_MILLISECOND, LAST_ALTERED) as version
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = CURRENT_SCHEMA()
+"""
+
+async def _table_version(tables: tuple[str, ...]) -> str | None:
+    try:
+        async with _version_lock:
+            rows = await acached(aquery_to_dicts, _TABLE_VERSIONS_QUERY, ttl=VERSION_TTL)
+    except Exception:
+        logger.warning("Table version lookup failed; responding without an ETag", exc_info=True)
+        return None
+    versions = {r['table_name']: r['version'] for r in rows}
+    return ",".join(f"{t}={versions.get(t)}" for t in tables)
+
+# Route dependency: Cache-Control plus a weak ETag derived from the source tables' LAST_ALTERED,
+# answering 304 before the route's own queries run when the client already has this version.
+def http_cache(*tables: str, max_age: int = MAX_AGE):
+    async def dependency(request: Request):
+        headers = {
+            "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={STALE_WHILE_REVALIDATE}",
+        }
+        version = await _table_version(tables)
+        if version is not None:
+            key = f"{request.url.path}?{request.url.query}|{version}"
+            headers["ETag"] = f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+            if headers["ETag"] in request.headers.get("if-none-match", ""):
+                raise HTTPException(status_code=304, headers=headers)
+        request.state.cache_headers = headers
+    return dependency
+
+# Copies headers set by http_cache onto the response, whatever Response type the route returned.
+class CacheHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                cache_headers = scope.get("state", {}).get("cache_headers")
+                if cache_headers and message["status"] == 200:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in cache_headers.items():
+                        headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+# Encoded response bodies keyed by the request's ETag; a new table version produces a new key.
+def cached_body(request: Request) -> bytes | None:
+    etag = getattr(request.state, "cache_headers", {}).get("ETag")
+    body = _bodies.get(etag) if etag else None
+    if body is not None:
+        _bodies.move_to_end(etag)
+    return body
+
+def store_body(request: Request, body: bytes) -> bytes:
+    etag = getattr(request.state, "cache_headers", {}).get("ETag")
+    if etag:
+        _bodies[etag] = body
+        while len(_bodies) > BODY_CACHE_MAXSIZE:
+            _bodies.popitem(last=False)
+    return body
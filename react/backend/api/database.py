@@ -1,18 +1,46 @@
 import os
+import time
+import logging
+import queue
+import asyncio
+import orjson
+import pyarrow as pa
 import toml
+from decimal import Decimal
 from pathlib import Path
+from collections import OrderedDict
+from functools import lru_cache
 import snowflake.connector
 from contextlib import contextmanager
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 
+logger = logging.getLogger(__name__)
+
 DATABASE = "GNN_SUPPLY_CHAIN_RISK"
 SCHEMA = "GNN_SUPPLY_CHAIN_RISK"
 
-_connection = None
+POOL_SIZE = int(os.getenv("SNOWFLAKE_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("SNOWFLAKE_POOL_TIMEOUT", "30"))
 
-def _load_private_key(key_path: str):
-    with open(os.path.expanduser(key_path), "rb") as key_file:
+# LIFO so the most recently returned (warmest) connection is reused first.
+# Each slot holds a live connection or None until it is first checked out.
+_pool: queue.LifoQueue = queue.LifoQueue(maxsize=POOL_SIZE)
+for _ in range(POOL_SIZE):
+    _pool.put_nowait(None)
+
+CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "60"))
+CACHE_MAXSIZE = 64
+
+# (helper, query, params) -> (expires_at, result) for slow-changing reference data
+_cache: OrderedDict = OrderedDict()
+
+# File loaders are memoized per (path, mtime): every pooled connection reuses one parsed
+# config and key object, and a rotated file is picked up on the next connect.
+@lru_cache(maxsize=1)
+def _read_private_key(key_path: str, mtime: float):
+    with open(key_path, "rb") as key_file:
         private_key = serialization.load_pem_private_key(
             key_file.read(),
             password=None,
@@ -20,13 +48,21 @@ def _load_private_key(key_path: str):
         )
     return private_key
 
+@lru_cache(maxsize=1)
+def _read_toml(config_path: Path, mtime: float) -> dict:
+    return toml.load(config_path)
+
+def _load_private_key(key_path: str):
+    path = os.path.expanduser(key_path)
+    return _read_private_key(path, os.path.getmtime(path))
+
 def _load_snowflake_config():
     config_path = Path.home() / ".snowflake" / "connections.toml"
     if not config_path.exists():
         config_path = Path.home() / ".snowflake" / "config.toml"
     
     if config_path.exists():
-        config = toml.load(config_path)
+        config = _read_toml(config_path, config_path.stat().st_mtime)
         connection_name = os.getenv("SNOWFLAKE_CONNECTION_NAME", "demo")
         
         if connection_name in config:
@@ -39,57 +75,210 @@ def _load_snowflake_config():
                     return value
     return None
 
-def get_connection():
-    global _connection
-    if _connection is None or _connection.is_closed():
-        config = _load_snowflake_config()
+def _connect():
+    config = _load_snowflake_config()
+    
+    if config:
+        conn_params = {
+            "account": config.get("account") or config.get("accountname"),
+            "user": config.get("user") or config.get("username"),
+            "database": DATABASE,
+            "schema": SCHEMA,
+        }
         
-        if config:
-            conn_params = {
-                "account": config.get("account") or config.get("accountname"),
-                "user": config.get("user") or config.get("username"),
-                "database": DATABASE,
-                "schema": SCHEMA,
-            }
-            
-            authenticator = config.get("authenticator", "").upper()
-            if authenticator == "SNOWFLAKE_JWT" and "private_key_file" in config:
-                conn_params["private_key"] = _load_private_key(config["private_key_file"])
-            elif "password" in config:
-                conn_params["password"] = config["password"]
-            else:
-                conn_params["authenticator"] = "externalbrowser"
-            
-            if "warehouse" in config:
-                conn_params["warehouse"] = config["warehouse"]
-            if "role" in config:
-                conn_params["role"] = config["role"]
-            
-            _connection = snowflake.connector.connect(**conn_params)
+        authenticator = config.get("authenticator", "").upper()
+        if authenticator == "SNOWFLAKE_JWT" and "private_key_file" in config:
+            conn_params["private_key"] = _load_private_key(config["private_key_file"])
+        elif "password" in config:
+            conn_params["password"] = config["password"]
         else:
-            _connection = snowflake.connector.connect(
-                account=os.getenv("SNOWFLAKE_ACCOUNT", "sfsenorthamerica-trsmith_aws1"),
-                user=os.getenv("SNOWFLAKE_USER", "trsmith"),
-                authenticator="externalbrowser",
-                database=DATABASE,
-                schema=SCHEMA,
-            )
-    return _connection
+            conn_params["authenticator"] = "externalbrowser"
+        
+        if "warehouse" in config:
+            conn_params["warehouse"] = config["warehouse"]
+        if "role" in config:
+            conn_params["role"] = config["role"]
+        
+        return snowflake.connector.connect(**conn_params)
+    return snowflake.connector.connect(
+        account=os.getenv("SNOWFLAKE_ACCOUNT", "sfsenorthamerica-trsmith_aws1"),
+        user=os.getenv("SNOWFLAKE_USER", "trsmith"),
+        authenticator="externalbrowser",
+        database=DATABASE,
+        schema=SCHEMA,
+    )
+
+def _checkout():
+    conn = _pool.get(timeout=POOL_TIMEOUT)
+    try:
+        if conn is None or conn.is_closed():
+            conn = _connect()
+    except Exception:
+        _pool.put_nowait(None)
+        raise
+    return conn
+
+# Best-effort warm-up of a single connection; the other slots stay None and connect on first checkout.
+# A failure here is logged rather than raised, so startup behaves like the old lazy connection.
+def init_pool():
+    try:
+        with get_connection():
+            pass
+    except Exception:
+        logger.warning("Snowflake connection warm-up failed; connecting on first request", exc_info=True)
+
+def close_pool():
+    conns = [_pool.get_nowait() for _ in range(_pool.qsize())]
+    for conn in conns:
+        if conn is not None and not conn.is_closed():
+            conn.close()
+        _pool.put_nowait(None)
 
 @contextmanager
-def get_cursor():
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_connection():
+    conn = _checkout()
     try:
-        yield cursor
+        yield conn
     finally:
-        cursor.close()
+        _pool.put_nowait(conn)
 
-def query_to_dicts(cursor, query: str, params: tuple = None) -> list[dict]:
-    cursor.execute(query, params)
+@contextmanager
+def get_cursor():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def to_json_bytes(obj) -> bytes:
+    return orjson.dumps(obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+# Default response class, so routes returning dicts share the streaming encoder
+class JSONBytesResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return to_json_bytes(content)
+
+def _fetch_dicts(cursor) -> list[dict]:
     columns = [desc[0].lower() for desc in cursor.description]
     return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
+def _fetch_rows(cursor) -> tuple[list[str], list[tuple]]:
+    return [desc[0].lower() for desc in cursor.description], cursor.fetchall()
+
+# Encodes row tuples as a JSON array of objects without building a dict per row
+def rows_to_json_bytes(columns: list[str], rows: list[tuple]) -> bytes:
+    keys = [(b"{" if i == 0 else b",") + orjson.dumps(name) + b":" for i, name in enumerate(columns)]
+    buf = bytearray(b"[")
+    for row in rows:
+        for key, value in zip(keys, row):
+            buf += key
+            buf += to_json_bytes(value)
+        buf += b"},"
+    if rows:
+        buf[-1:] = b"]"
+    else:
+        buf += b"]"
+    return bytes(buf)
+
+def _fetch_arrow(cursor) -> pa.Table:
+    columns = [desc[0].lower() for desc in cursor.description]
+    table = cursor.fetch_arrow_all()
+    if table is None:
+        return pa.table({name: pa.array([], pa.null()) for name in columns})
+    return table.rename_columns(columns)
+
+def _execute_multi(cursor, queries: list[str], params: tuple = None):
+    cursor.execute(";\n".join(q.strip() for q in queries), params, num_statements=len(queries))
+    yield cursor
+    while cursor.nextset():
+        yield cursor
+
+def query_to_dicts(cursor, query: str, params: tuple = None) -> list[dict]:
+    cursor.execute(query, params)
+    return _fetch_dicts(cursor)
+
+def query_to_rows(cursor, query: str, params: tuple = None) -> tuple[list[str], list[tuple]]:
+    cursor.execute(query, params)
+    return _fetch_rows(cursor)
+
+def query_to_arrow(cursor, query: str, params: tuple = None) -> pa.Table:
+    cursor.execute(query, params)
+    return _fetch_arrow(cursor)
+
+def query_multi_to_dicts(cursor, queries: list[str], params: tuple = None) -> list[list[dict]]:
+    return [_fetch_dicts(c) for c in _execute_multi(cursor, queries, params)]
+
+def query_multi_to_arrow(cursor, queries: list[str], params: tuple = None) -> list[pa.Table]:
+    return [_fetch_arrow(c) for c in _execute_multi(cursor, queries, params)]
+
 def query_one(cursor, query: str, params: tuple = None) -> dict | None:
     results = query_to_dicts(cursor, query, params)
     return results[0] if results else None
+
+async def _run_query(fn, query: str, params: tuple = None):
+    def run():
+        with get_cursor() as cursor:
+            return fn(cursor, query, params)
+    return await asyncio.to_thread(run)
+
+async def aquery_to_dicts(query: str, params: tuple = None) -> list[dict]:
+    return await _run_query(query_to_dicts, query, params)
+
+async def aquery_to_rows(query: str, params: tuple = None) -> tuple[list[str], list[tuple]]:
+    return await _run_query(query_to_rows, query, params)
+
+async def aquery_to_arrow(query: str, params: tuple = None) -> pa.Table:
+    return await _run_query(query_to_arrow, query, params)
+
+async def aquery_multi_to_dicts(queries: list[str], params: tuple = None) -> list[list[dict]]:
+    return await _run_query(query_multi_to_dicts, queries, params)
+
+async def aquery_multi_to_arrow(queries: list[str], params: tuple = None) -> list[pa.Table]:
+    return await _run_query(query_multi_to_arrow, queries, params)
+
+async def aquery_one(query: str, params: tuple = None) -> dict | None:
+    return await _run_query(query_one, query, params)
+
+def query_to_arrow_batches(cursor, query: str, params: tuple = None) -> list[pa.Table]:
+    cursor.execute(query, params)
+    columns = [desc[0].lower() for desc in cursor.description]
+    return [batch.rename_columns(columns) for batch in cursor.fetch_arrow_batches()]
+
+def _json_array_chunks(batches: list[pa.Table]):
+    separator = b"["
+    for batch in batches:
+        rows = batch.to_pylist()
+        if rows:
+            yield separator + to_json_bytes(rows)[1:-1]
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+# Batches are fetched and the pooled connection released before streaming,
+# so a slow client only holds Arrow buffers, never a pool slot.
+async def aquery_response(query: str, params: tuple = None) -> StreamingResponse:
+    batches = await _run_query(query_to_arrow_batches, query, params)
+    return StreamingResponse(_json_array_chunks(batches), media_type="application/json")
+
+async def acached(fn, query: str, params: tuple = None, ttl: float = CACHE_TTL):
+    key = (fn.__name__, query, params)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return entry[1]
+    result = await fn(query, params)
+    _cache[key] = (time.monotonic() + ttl, result)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAXSIZE:
+        _cache.popitem(last=False)
+    return result
+
+def clear_cache():
+    _cache.clear()
+    _read_toml.cache_clear()
+    _read_private_key.cache_clear()
@@ -0,0 +1,9 @@
+import numpy as np
+
+def ring_positions(count: int, radius: float, center_x: float, center_y: float) -> list[dict]:
+    # Evenly spaced around a circle, starting at 12 o'clock
+    angles = np.linspace(-np.pi / 2, 3 * np.pi / 2, count, endpoint=False)
+    # Sub-pixel precision is invisible on screen and only bloats the JSON
+    xs = np.round(center_x + radius * np.cos(angles), 1)
+    ys = np.round(center_y + radius * np.sin(angles), 1)
+    return [{"x": x, "y": y} for x, y in zip(xs.tolist(), ys.tolist())]
@@ -1,23 +1,39 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import risk, network, metrics, simulator, agent, links
+from fastapi.middleware.gzip import GZipMiddleware
+from .database import JSONBytesResponse, init_pool, close_pool
+from .pagination import NEXT_CURSOR_HEADER
+from .caching import CacheHeadersMiddleware
+from .routes import risk, network, metrics, simulator, agent, links, admin
 
-app = FastAPI(title="GNN Supply Chain Risk API")
+app = FastAPI(title="GNN Supply Chain Risk API", default_response_class=JSONBytesResponse)
 
+app.add_middleware(CacheHeadersMiddleware)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.on_event("startup")
+def warm_connection_pool():
+    init_pool()
+
+@app.on_event("shutdown")
+def drain_connection_pool():
+    close_pool()
+
 app.include_router(metrics.router, prefix="/api")
 app.include_router(risk.router, prefix="/api")
 app.include_router(network.router, prefix="/api")
 app.include_router(simulator.router, prefix="/api")
 app.include_router(agent.router, prefix="/api")
 app.include_router(links.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 @app.get("/api/health")
 def health():
@@ -0,0 +1,30 @@
+from fastapi import HTTPException, Response
+from .database import rows_to_json_bytes
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Keyset pages are ordered by (score DESC, id ASC); the cursor is "<score>:<id>" of the last row.
+def decode_cursor(after: str | None) -> tuple[float | None, int | None]:
+    if after is None:
+        return None, None
+    score, _, key = after.partition(":")
+    try:
+        return float(score), int(key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {after}")
+
+# Requests without limit or after get every row, as before pagination; a cursor alone pages by DEFAULT_LIMIT.
+def page_limit(limit: int | None, after: str | None) -> int | None:
+    if limit is None and after is not None:
+        return DEFAULT_LIMIT
+    return limit
+
+def page_response(columns: list[str], rows: list[tuple], limit: int | None, score_key: str, id_key: str) -> Response:
+    headers = {}
+    if limit is not None and len(rows) == limit:
+        last = rows[-1]
+        score, key = last[columns.index(score_key)], last[columns.index(id_key)]
+        headers[NEXT_CURSOR_HEADER] = f"{float(score)!r}:{int(key)}"
+    return Response(content=rows_to_json_bytes(columns, rows), media_type="application/json", headers=headers)
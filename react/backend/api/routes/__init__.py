@@ -1 +1 @@
-from . import risk, network, metrics, simulator, agent, links
+from . import risk, network, metrics, simulator, agent, links, admin
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from ..database import clear_cache
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.post("/refresh")
+async def refresh_reference_cache():
+    clear_cache()
+    return {"status": "refreshed"}
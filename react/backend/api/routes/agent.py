@@ -1,83 +1,147 @@
-import os
-import json
-from typing import AsyncGenerator
+import asyncio
+import orjson
+import requests
+from collections import OrderedDict, deque
+from typing import AsyncGenerator, Iterator
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import snowflake.connector
+from starlette.concurrency import iterate_in_threadpool
+from ..database import get_connection
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
-DATABASE = "GNN_SUPPLY_CHAIN_RISK"
-SCHEMA = "GNN_SUPPLY_CHAIN_RISK"
 AGENT_NAME = "SUPPLY_CHAIN_RISK_AGENT"
+MODEL = "llama3.1-70b"
+SYSTEM_PROMPT = (
+    "You are a supply chain risk analyst. Answer questions about vendors, risk scores, bottlenecks, and regional risks. "
+    "Be concise and data-driven."
+)
 
 class AgentRequest(BaseModel):
     message: str
     context: str | None = None
     conversation_id: str | None = None
 
-conversations: dict[str, list[dict]] = {}
+MAX_CONVERSATIONS = 1024
+MAX_TURNS = 20
+CONTEXT_TURNS = 10
 
-def get_connection():
-    connection_name = os.getenv("SNOWFLAKE_CONNECTION_NAME", "demo")
-    return snowflake.connector.connect(connection_name=connection_name)
+# Least recently used conversation first; each history keeps only the last MAX_TURNS turns.
+conversations: OrderedDict[str, deque] = OrderedDict()
+conversation_stats = {"hits": 0, "misses": 0, "evictions": 0}
 
-async def stream_agent_response(message: str, context: str | None, conversation_id: str | None) -> AsyncGenerator[str, None]:
+def _get_conversation(conv_id: str) -> deque:
+    history = conversations.get(conv_id)
+    if history is None:
+        conversation_stats["misses"] += 1
+        history = conversations[conv_id] = deque(maxlen=MAX_TURNS)
+        if len(conversations) > MAX_CONVERSATIONS:
+            conversations.popitem(last=False)
+            conversation_stats["evictions"] += 1
+    else:
+        conversation_stats["hits"] += 1
+        conversations.move_to_end(conv_id)
+    return history
+
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+def _sse(payload: dict) -> bytes:
+    return _SSE_PREFIX + orjson.dumps(payload) + _SSE_SUFFIX
+
+# Frames that never change are encoded once at import time
+_CONNECTING_FRAME = _sse({'type': 'reasoning', 'stage': 'Connecting to agent...'})
+_TOOL_START_FRAME = _sse({'type': 'tool_start', 'tool_name': 'SUPPLY_CHAIN_ANALYTICS'})
+_TOOL_END_FRAME = _sse({'type': 'tool_end', 'tool_name': 'SUPPLY_CHAIN_ANALYTICS', 'output': 'Query completed'})
+_DONE_FRAME = _SSE_PREFIX + b"[DONE]" + _SSE_SUFFIX
+
+# (connect, read) seconds; the read timeout bounds the gap between streamed events
+CORTEX_TIMEOUT = (10, 120)
+
+def _complete_stream(host: str, token: str, messages: list[dict]) -> Iterator[str]:
+    response = requests.post(
+        f"https://{host}/api/v2/cortex/inference:complete",
+        headers={
+            "Authorization": f'Snowflake Token="{token}"',
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        },
+        data=orjson.dumps({"model": MODEL, "messages": messages, "stream": True}),
+        stream=True,
+        timeout=CORTEX_TIMEOUT,
+    )
+    with response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            event = orjson.loads(line[5:])
+            for choice in event.get("choices", []):
+                text = choice.get("delta", {}).get("content")
+                if text:
+                    yield text
+
+# The connector has no public accessor for the session token, so the private attribute is read here only
+def _session_token(conn) -> str:
+    token = getattr(getattr(conn, "rest", None), "token", None)
+    if not token:
+        raise RuntimeError("Snowflake connection exposes no REST session token; cannot call Cortex")
+    return token
+
+# Pool checkout can block or open a new connection, so callers run this off the event loop
+def _session_credentials() -> tuple[str, str]:
+    with get_connection() as conn:
+        return conn.host, _session_token(conn)
+
+async def stream_agent_response(message: str, context: str | None, conversation_id: str | None) -> AsyncGenerator[bytes, None]:
     full_message = message
     if context:
         full_message = f"[Context: {context}]\n\n{message}"
     
-    conv_id = conversation_id or "default"
-    if conv_id not in conversations:
-        conversations[conv_id] = []
-    
-    conversations[conv_id].append({
+    history = _get_conversation(conversation_id or "default")
+    history.append({
         "role": "user",
         "content": [{"type": "text", "text": full_message}]
     })
     
     try:
-        yield f"data: {json.dumps({'type': 'reasoning', 'stage': 'Connecting to agent...'})}\n\n"
+        yield _CONNECTING_FRAME
         
-        conn = get_connection()
-        cursor = conn.cursor()
+        host, token = await asyncio.to_thread(_session_credentials)
         
-        messages_json = json.dumps(conversations[conv_id][-10:])
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}] + [
+            {"role": m["role"], "content": m["content"][0]["text"]}
+            for m in list(history)[-CONTEXT_TURNS:]
+        ]
         
-        cursor.execute(f"""
-            SELECT SNOWFLAKE.CORTEX.COMPLETE(
-                'llama3.1-70b',
-                CONCAT(
-                    'You are a supply chain risk analyst. Answer questions about vendors, risk scores, bottlenecks, and regional risks. ',
-                    'Be concise and data-driven. ',
-                    'User question: ', %s
-                )
-            ) as response
-        """, (full_message,))
+        yield _TOOL_START_FRAME
         
-        result = cursor.fetchone()
-        response_text = result[0] if result else "I couldn't process that request."
+        parts = []
+        chunks = _complete_stream(host, token, messages)
+        try:
+            async for text in iterate_in_threadpool(chunks):
+                parts.append(text)
+                yield _sse({'type': 'text_delta', 'text': text})
+        finally:
+            # Runs on client disconnect too, closing the HTTP response inside the generator
+            chunks.close()
         
-        yield f"data: {json.dumps({'type': 'tool_start', 'tool_name': 'SUPPLY_CHAIN_ANALYTICS'})}\n\n"
-        yield f"data: {json.dumps({'type': 'tool_end', 'tool_name': 'SUPPLY_CHAIN_ANALYTICS', 'output': 'Query completed'})}\n\n"
+        yield _TOOL_END_FRAME
         
-        for i in range(0, len(response_text), 50):
-            chunk = response_text[i:i+50]
-            yield f"data: {json.dumps({'type': 'text_delta', 'text': chunk})}\n\n"
+        response_text = "".join(parts) or "I couldn't process that request."
+        if not parts:
+            yield _sse({'type': 'text_delta', 'text': response_text})
         
-        conversations[conv_id].append({
+        history.append({
             "role": "assistant",
             "content": [{"type": "text", "text": response_text}]
         })
         
-        cursor.close()
-        conn.close()
-        
     except Exception as e:
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        yield _sse({'type': 'error', 'message': str(e)})
     
-    yield "data: [DONE]\n\n"
+    yield _DONE_FRAME
 
 @router.post("/run")
 async def run_agent(request: AgentRequest):
@@ -87,7 +151,9 @@ async def run_agent(request: AgentRequest):
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
+            "X-Accel-Buffering": "no",
+            # Keeps GZipMiddleware from buffering events
+            "Content-Encoding": "identity"
         }
     )
 
@@ -96,3 +162,12 @@ async def clear_conversation(conversation_id: str = "default"):
     if conversation_id in conversations:
         del conversations[conversation_id]
     return {"status": "cleared"}
+
+@router.get("/stats")
+async def conversation_cache_stats():
+    return {
+        **conversation_stats,
+        "conversations": len(conversations),
+        "max_conversations": MAX_CONVERSATIONS,
+        "max_turns": MAX_TURNS,
+    }
@@ -1,21 +1,29 @@
-from fastapi import APIRouter
-from ..database import get_cursor, query_to_dicts
+from fastapi import APIRouter, Depends, Query
+from ..caching import http_cache
+from ..database import aquery_to_rows
+from ..pagination import MAX_LIMIT, decode_cursor, page_limit, page_response
 
 router = APIRouter(prefix="/links", tags=["links"])
 
-@router.get("/predicted")
-def get_predicted_links():
-    with get_cursor() as cursor:
-        return query_to_dicts(cursor, """
-            SELECT 
-                LINK_ID as link_id,
-                SOURCE_NODE_ID as source_node_id,
-                SOURCE_NODE_TYPE as source_node_type,
-                TARGET_NODE_ID as target_node_id,
-                TARGET_NODE_TYPE as target_node_type,
-                LINK_TYPE as link_type,
-                PROBABILITY as probability,
-                EVIDENCE_STRENGTH as evidence_strength
-            FROM PREDICTED_LINKS
-            ORDER BY PROBABILITY DESC
-        """)
+_PREDICTED_LINKS_QUERY = """
+    SELECT 
+        LINK_ID as link_id,
+        SOURCE_NODE_ID as source_node_id,
+        SOURCE_NODE_TYPE as source_node_type,
+        TARGET_NODE_ID as target_node_id,
+        TARGET_NODE_TYPE as target_node_type,
+        LINK_TYPE as link_type,
+        PROBABILITY as probability,
+        EVIDENCE_STRENGTH as evidence_strength
+    FROM PREDICTED_LINKS
+    WHERE %s IS NULL OR PROBABILITY < %s OR (PROBABILITY = %s AND LINK_ID > %s)
+    ORDER BY PROBABILITY DESC, LINK_ID
+    LIMIT %s
+"""
+
+@router.get("/predicted", dependencies=[Depends(http_cache("PREDICTED_LINKS"))])
+async def get_predicted_links(limit: int | None = Query(None, ge=1, le=MAX_LIMIT), after: str | None = None):
+    limit = page_limit(limit, after)
+    after_probability, after_id = decode_cursor(after)
+    columns, rows = await aquery_to_rows(_PREDICTED_LINKS_QUERY, (after_probability, after_probability, after_probability, after_id, limit))
+    return page_response(columns, rows, limit, "probability", "link_id")
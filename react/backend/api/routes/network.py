@@ -1,225 +1,271 @@
-from fastapi import APIRouter
-from ..database import get_cursor, query_to_dicts
+import asyncio
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import APIRouter, Depends, Request, Response
+from ..caching import cached_body, http_cache, store_body
+from ..database import aquery_multi_to_arrow, aquery_to_arrow, aquery_to_dicts, to_json_bytes
+from ..layout import ring_positions
 
 router = APIRouter(prefix="/network", tags=["network"])
 
-@router.get("/graph")
-def get_network_graph():
-    with get_cursor() as cursor:
-        vendors = query_to_dicts(cursor, """
-            SELECT 
-                v.VENDOR_ID as id,
-                v.NAME as label,
-                v.COUNTRY_CODE as country,
-                v.TIER as tier,
-                COALESCE(rs.RISK_SCORE, 0.5) as risk_score,
-                COALESCE(rs.RISK_CATEGORY, 'MEDIUM') as risk_category
-            FROM VENDORS v
-            LEFT JOIN RISK_SCORES rs ON rs.NODE_ID = v.VENDOR_ID
-        """)
-        
-        materials = query_to_dicts(cursor, """
-            SELECT 
-                MATERIAL_ID as id,
-                DESCRIPTION as label,
-                CRITICALITY_SCORE as criticality
-            FROM MATERIALS
-        """)
-        
-        regions = query_to_dicts(cursor, """
-            SELECT 
-                r.REGION_CODE as id,
-                r.REGION_NAME as label,
-                r.BASE_RISK_SCORE as base_risk,
-                COUNT(DISTINCT v.VENDOR_ID) as vendor_count
-            FROM REGIONS r
-            LEFT JOIN VENDORS v ON v.COUNTRY_CODE = r.REGION_CODE
-            GROUP BY r.REGION_CODE, r.REGION_NAME, r.BASE_RISK_SCORE
-        """)
-        
-        bottleneck_ids = query_to_dicts(cursor, "SELECT NODE_ID as id FROM BOTTLENECKS")
-        bottleneck_set = {b['id'] for b in bottleneck_ids}
-        
-        external = query_to_dicts(cursor, """
-            SELECT DISTINCT
-                rs.NODE_ID as id,
-                rs.NODE_ID as label,
-                rs.RISK_SCORE as risk_score
-            FROM RISK_SCORES rs
-            WHERE rs.NODE_TYPE = 'EXTERNAL_SUPPLIER'
-        """)
-        
-        nodes = []
-        for v in vendors:
-            nodes.append({
-                "id": v['id'],
-                "type": "vendor",
-                "position": {"x": 0, "y": 0},
-                "data": {
-                    "label": v['label'],
-                    "vendor_id": v['id'],
-                    "risk_score": float(v['risk_score']),
-                    "risk_category": v['risk_category'],
-                    "country": v['country'],
-                    "tier": v['tier']
-                }
-            })
-        
-        for m in materials:
-            nodes.append({
-                "id": m['id'],
-                "type": "material",
-                "position": {"x": 0, "y": 0},
-                "data": {
-                    "label": m['label'],
-                    "material_id": m['id'],
-                    "criticality": float(m['criticality'] or 0.5)
-                }
-            })
-        
-        for r in regions:
-            nodes.append({
-                "id": r['id'],
-                "type": "region",
-                "position": {"x": 0, "y": 0},
-                "data": {
-                    "label": r['label'],
-                    "region_code": r['id'],
-                    "base_risk": float(r['base_risk'] or 0),
-                    "vendor_count": r['vendor_count']
-                }
-            })
-        
-        for e in external:
-            nodes.append({
-                "id": e['id'],
-                "type": "external",
-                "position": {"x": 0, "y": 0},
-                "data": {
-                    "label": e['label'],
-                    "node_id": e['id'],
-                    "risk_score": float(e['risk_score']),
-                    "is_bottleneck": e['id'] in bottleneck_set
-                }
-            })
-        
-        edges = []
-        
-        po_edges = query_to_dicts(cursor, """
-            SELECT DISTINCT VENDOR_ID as source, MATERIAL_ID as target 
-            FROM PURCHASE_ORDERS
-        """)
-        for e in po_edges:
-            edges.append({
-                "id": f"supplies-{e['source']}-{e['target']}",
-                "source": e['source'],
-                "target": e['target'],
-                "type": "supplies",
-                "data": {"edge_type": "supplies"}
-            })
-        
-        for v in vendors:
-            edges.append({
-                "id": f"located-{v['id']}-{v['country']}",
-                "source": v['id'],
-                "target": v['country'],
-                "type": "located_in",
-                "data": {"edge_type": "located_in"}
-            })
-        
-        predicted = query_to_dicts(cursor, """
-            SELECT 
-                SOURCE_NODE_ID as source,
-                TARGET_NODE_ID as target,
-                PROBABILITY as probability
-            FROM PREDICTED_LINKS
-            WHERE PROBABILITY > 0.5
-        """)
-        for p in predicted:
-            edges.append({
-                "id": f"predicted-{p['source']}-{p['target']}",
-                "source": p['source'],
-                "target": p['target'],
-                "type": "predicted",
-                "data": {"edge_type": "predicted", "probability": float(p['probability'])}
-            })
-        
-        return {"nodes": nodes, "edges": edges}
+# Shared by every node: the frontend lays out the full graph itself.
+_ORIGIN = {"x": 0, "y": 0}
 
-@router.get("/ego/{node_id}")
-def get_ego_graph(node_id: str):
-    with get_cursor() as cursor:
-        bottleneck = query_to_dicts(cursor, """
-            SELECT 
-                NODE_ID as id,
-                NODE_TYPE as type,
-                DEPENDENT_COUNT as dependent_count,
-                IMPACT_SCORE as impact_score
-            FROM BOTTLENECKS
-            WHERE NODE_ID = %s
-        """, (node_id,))
-        
-        if not bottleneck:
-            return {"nodes": [], "edges": []}
-        
-        bn = bottleneck[0]
-        
-        dependents = query_to_dicts(cursor, """
-            SELECT DISTINCT
-                v.VENDOR_ID as id,
-                v.NAME as label,
-                v.COUNTRY_CODE as country,
-                COALESCE(rs.RISK_SCORE, 0.5) as risk_score,
-                COALESCE(rs.RISK_CATEGORY, 'MEDIUM') as risk_category
-            FROM BOTTLENECKS b
-            JOIN VENDORS v ON ARRAY_CONTAINS(v.VENDOR_ID::VARIANT, PARSE_JSON(b.DEPENDENT_NODES[0]))
-            LEFT JOIN RISK_SCORES rs ON rs.NODE_ID = v.VENDOR_ID
-            WHERE b.NODE_ID = %s
-        """, (node_id,))
-        
-        import math
-        num_deps = len(dependents)
-        center_x = 400
-        center_y = 300
-        radius = max(250, num_deps * 12)
-        
-        nodes = [{
-            "id": node_id,
+def _column(table: pa.Table, name: str) -> list:
+    return table[name].to_pylist()
+
+def _floats(table: pa.Table, name: str, default: float | None = None) -> list:
+    column = pc.cast(table[name], pa.float64())
+    if default is not None:
+        column = pc.fill_null(column, default)
+    return column.to_pylist()
+
+# Node data omits the *_id copies of the node's own id, which the graph never reads.
+def _graph_nodes(vendors, materials, regions, external):
+    for id_, label, country, tier, risk_score, risk_category in zip(
+        _column(vendors, 'id'), _column(vendors, 'label'), _column(vendors, 'country'),
+        _column(vendors, 'tier'), _floats(vendors, 'risk_score'), _column(vendors, 'risk_category'),
+    ):
+        yield {
+            "id": id_,
+            "type": "vendor",
+            "position": _ORIGIN,
+            "data": {
+                "label": label,
+                "risk_score": risk_score,
+                "risk_category": risk_category,
+                "country": country,
+                "tier": tier
+            }
+        }
+    
+    for id_, label, criticality in zip(
+        _column(materials, 'id'), _column(materials, 'label'), _floats(materials, 'criticality', 0.5),
+    ):
+        yield {
+            "id": id_,
+            "type": "material",
+            "position": _ORIGIN,
+            "data": {
+                "label": label,
+                "criticality": criticality
+            }
+        }
+    
+    for id_, label, base_risk, vendor_count in zip(
+        _column(regions, 'id'), _column(regions, 'label'), _floats(regions, 'base_risk', 0.0),
+        _column(regions, 'vendor_count'),
+    ):
+        yield {
+            "id": id_,
+            "type": "region",
+            "position": _ORIGIN,
+            "data": {
+                "label": label,
+                "base_risk": base_risk,
+                "vendor_count": vendor_count
+            }
+        }
+    
+    for id_, label, risk_score, is_bottleneck in zip(
+        _column(external, 'id'), _column(external, 'label'), _floats(external, 'risk_score'),
+        _column(external, 'is_bottleneck'),
+    ):
+        yield {
+            "id": id_,
             "type": "external",
-            "position": {"x": center_x, "y": center_y},
+            "position": _ORIGIN,
             "data": {
-                "label": node_id,
-                "node_id": node_id,
-                "risk_score": float(bn['impact_score']),
-                "is_bottleneck": True
+                "label": label,
+                "risk_score": risk_score,
+                "is_bottleneck": is_bottleneck
             }
-        }]
-        
-        for i, d in enumerate(dependents):
-            angle = (2 * math.pi * i) / max(num_deps, 1) - math.pi / 2
-            nodes.append({
-                "id": d['id'],
-                "type": "vendor",
-                "position": {"x": center_x + radius * math.cos(angle), "y": center_y + radius * math.sin(angle)},
-                "data": {
-                    "label": d['label'],
-                    "vendor_id": d['id'],
-                    "risk_score": float(d['risk_score']),
-                    "risk_category": d['risk_category'],
-                    "country": d['country'],
-                    "tier": 1
-                }
-            })
-        
-        edges = [
-            {
-                "id": f"dep-{node_id}-{d['id']}",
-                "source": node_id,
-                "target": d['id'],
-                "type": "predicted",
-                "data": {"edge_type": "predicted", "probability": 0.9}
+        }
+
+# The edge type already selects the renderer, so data only carries what the edge draws.
+def _graph_edges(vendors, po_edges, predicted):
+    for source, target in zip(_column(po_edges, 'source'), _column(po_edges, 'target')):
+        yield {
+            "id": f"supplies-{source}-{target}",
+            "source": source,
+            "target": target,
+            "type": "supplies"
+        }
+    
+    for id_, country in zip(_column(vendors, 'id'), _column(vendors, 'country')):
+        yield {
+            "id": f"located-{id_}-{country}",
+            "source": id_,
+            "target": country,
+            "type": "located_in"
+        }
+    
+    for source, target, probability in zip(
+        _column(predicted, 'source'), _column(predicted, 'target'), _floats(predicted, 'probability'),
+    ):
+        yield {
+            "id": f"predicted-{source}-{target}",
+            "source": source,
+            "target": target,
+            "type": "predicted",
+            "data": {"probability": probability}
+        }
+
+# Graph queries, sent to Snowflake as one multi-statement request
+_GRAPH_QUERIES = [
+    """
+    SELECT 
+        v.VENDOR_ID as id,
+        v.NAME as label,
+        v.COUNTRY_CODE as country,
+        v.TIER as tier,
+        COALESCE(rs.RISK_SCORE, 0.5) as risk_score,
+        COALESCE(rs.RISK_CATEGORY, 'MEDIUM') as risk_category
+    FROM VENDORS v
+    LEFT JOIN RISK_SCORES rs ON rs.NODE_ID = v.VENDOR_ID
+    """,
+    """
+    SELECT DISTINCT
+        rs.NODE_ID as id,
+        rs.NODE_ID as label,
+        rs.RISK_SCORE as risk_score,
+        b.NODE_ID IS NOT NULL as is_bottleneck
+    FROM RISK_SCORES rs
+    LEFT JOIN BOTTLENECKS b ON b.NODE_ID = rs.NODE_ID
+    WHERE rs.NODE_TYPE = 'EXTERNAL_SUPPLIER'
+    """,
+    """
+    SELECT DISTINCT VENDOR_ID as source, MATERIAL_ID as target 
+    FROM PURCHASE_ORDERS
+    """,
+    """
+    SELECT 
+        SOURCE_NODE_ID as source,
+        TARGET_NODE_ID as target,
+        PROBABILITY as probability
+    FROM PREDICTED_LINKS
+    WHERE PROBABILITY > 0.5
+    """,
+]
+
+_MATERIALS_QUERY = """
+    SELECT 
+        MATERIAL_ID as id,
+        DESCRIPTION as label,
+        CRITICALITY_SCORE as criticality
+    FROM MATERIALS
+"""
+
+_REGIONS_QUERY = """
+    SELECT 
+        r.REGION_CODE as id,
+        r.REGION_NAME as label,
+        r.BASE_RISK_SCORE as base_risk,
+        COUNT(DISTINCT v.VENDOR_ID) as vendor_count
+    FROM REGIONS r
+    LEFT JOIN VENDORS v ON v.COUNTRY_CODE = r.REGION_CODE
+    GROUP BY r.REGION_CODE, r.REGION_NAME, r.BASE_RISK_SCORE
+"""
+
+@router.get("/graph", dependencies=[Depends(http_cache("VENDORS", "RISK_SCORES", "MATERIALS", "REGIONS", "BOTTLENECKS", "PURCHASE_ORDERS", "PREDICTED_LINKS"))])
+async def get_network_graph(request: Request):
+    body = cached_body(request)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    
+    # Read fresh rather than through acached: the body is stored under this ETag's table versions
+    (vendors, external, po_edges, predicted), materials, regions = await asyncio.gather(
+        aquery_multi_to_arrow(_GRAPH_QUERIES),
+        aquery_to_arrow(_MATERIALS_QUERY),
+        aquery_to_arrow(_REGIONS_QUERY),
+    )
+    
+    nodes = _graph_nodes(vendors, materials, regions, external)
+    edges = _graph_edges(vendors, po_edges, predicted)
+    
+    body = store_body(request, to_json_bytes({"nodes": list(nodes), "edges": list(edges)}))
+    return Response(content=body, media_type="application/json")
+
+_BOTTLENECK_QUERY = """
+    SELECT 
+        NODE_ID as id,
+        NODE_TYPE as type,
+        DEPENDENT_COUNT as dependent_count,
+        IMPACT_SCORE as impact_score
+    FROM BOTTLENECKS
+    WHERE NODE_ID = %s
+"""
+
+_DEPENDENTS_QUERY = """
+    SELECT DISTINCT
+        v.VENDOR_ID as id,
+        v.NAME as label,
+        v.COUNTRY_CODE as country,
+        COALESCE(rs.RISK_SCORE, 0.5) as risk_score,
+        COALESCE(rs.RISK_CATEGORY, 'MEDIUM') as risk_category
+    FROM VW_BOTTLENECK_DEPENDENTS bd
+    JOIN VENDORS v ON v.VENDOR_ID = bd.VENDOR_ID
+    LEFT JOIN RISK_SCORES rs ON rs.NODE_ID = v.VENDOR_ID
+    WHERE bd.NODE_ID = %s
+"""
+
+@router.get("/ego/{node_id}", dependencies=[Depends(http_cache("BOTTLENECKS", "VENDORS", "RISK_SCORES"))])
+async def get_ego_graph(node_id: str, request: Request):
+    body = cached_body(request)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    
+    # Both lookups run on separate pooled connections; dependents are discarded for non-bottlenecks
+    bottleneck, dependents = await asyncio.gather(
+        aquery_to_dicts(_BOTTLENECK_QUERY, (node_id,)),
+        aquery_to_dicts(_DEPENDENTS_QUERY, (node_id,)),
+    )
+    
+    if not bottleneck:
+        return {"nodes": [], "edges": []}
+    
+    bn = bottleneck[0]
+    
+    num_deps = len(dependents)
+    center_x = 400
+    center_y = 300
+    radius = max(250, num_deps * 12)
+    
+    nodes = [{
+        "id": node_id,
+        "type": "external",
+        "position": {"x": center_x, "y": center_y},
+        "data": {
+            "label": node_id,
+            "risk_score": float(bn['impact_score']),
+            "is_bottleneck": True
+        }
+    }]
+    
+    for d, position in zip(dependents, ring_positions(num_deps, radius, center_x, center_y)):
+        nodes.append({
+            "id": d['id'],
+            "type": "vendor",
+            "position": position,
+            "data": {
+                "label": d['label'],
+                "risk_score": float(d['risk_score']),
+                "risk_category": d['risk_category'],
+                "country": d['country'],
+                "tier": 1
             }
-            for d in dependents
-        ]
-        
-        return {"nodes": nodes, "edges": edges}
+        })
+    
+    edges = [
+        {
+            "id": f"dep-{node_id}-{d['id']}",
+            "source": node_id,
+            "target": d['id'],
+            "type": "predicted",
+            "data": {"probability": 0.9}
+        }
+        for d in dependents
+    ]
+    
+    body = store_body(request, to_json_bytes({"nodes": nodes, "edges": edges}))
+    return Response(content=body, media_type="application/json")
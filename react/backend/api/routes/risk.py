@@ -1,73 +1,84 @@
-from fastapi import APIRouter
-from ..database import get_cursor, query_to_dicts
+from fastapi import APIRouter, Depends, Query
+from ..caching import http_cache
+from ..database import aquery_response, aquery_to_rows
+from ..pagination import MAX_LIMIT, decode_cursor, page_limit, page_response
 
 router = APIRouter(prefix="/risk", tags=["risk"])
 
-@router.get("/scores")
-def get_risk_scores():
-    with get_cursor() as cursor:
-        return query_to_dicts(cursor, """
-            SELECT 
-                SCORE_ID as score_id,
-                NODE_ID as node_id,
-                NODE_TYPE as node_type,
-                RISK_SCORE as risk_score,
-                RISK_CATEGORY as risk_category,
-                CONFIDENCE as confidence
-            FROM RISK_SCORES
-            ORDER BY RISK_SCORE DESC
-        """)
+_SCORES_QUERY = """
+    SELECT 
+        SCORE_ID as score_id,
+        NODE_ID as node_id,
+        NODE_TYPE as node_type,
+        RISK_SCORE as risk_score,
+        RISK_CATEGORY as risk_category,
+        CONFIDENCE as confidence
+    FROM RISK_SCORES
+    WHERE %s IS NULL OR RISK_SCORE < %s OR (RISK_SCORE = %s AND SCORE_ID > %s)
+    ORDER BY RISK_SCORE DESC, SCORE_ID
+    LIMIT %s
+"""
 
-@router.get("/bottlenecks")
-def get_bottlenecks():
-    with get_cursor() as cursor:
-        return query_to_dicts(cursor, """
-            SELECT 
-                BOTTLENECK_ID as bottleneck_id,
-                NODE_ID as node_id,
-                NODE_TYPE as node_type,
-                DEPENDENT_COUNT as dependent_count,
-                IMPACT_SCORE as impact_score,
-                DESCRIPTION as description,
-                MITIGATION_STATUS as mitigation_status
-            FROM BOTTLENECKS
-            ORDER BY IMPACT_SCORE DESC
-        """)
+@router.get("/scores", dependencies=[Depends(http_cache("RISK_SCORES"))])
+async def get_risk_scores(limit: int | None = Query(None, ge=1, le=MAX_LIMIT), after: str | None = None):
+    limit = page_limit(limit, after)
+    after_score, after_id = decode_cursor(after)
+    columns, rows = await aquery_to_rows(_SCORES_QUERY, (after_score, after_score, after_score, after_id, limit))
+    return page_response(columns, rows, limit, "risk_score", "score_id")
 
-@router.get("/bottleneck/{node_id}/dependents")
-def get_bottleneck_dependents(node_id: str):
-    with get_cursor() as cursor:
-        return query_to_dicts(cursor, """
-            SELECT DISTINCT
-                v.VENDOR_ID as vendor_id,
-                v.NAME as name,
-                v.COUNTRY_CODE as country_code,
-                v.CITY as city,
-                v.TIER as tier,
-                v.FINANCIAL_HEALTH_SCORE as financial_health_score,
-                rs.RISK_SCORE as risk_score,
-                rs.RISK_CATEGORY as risk_category
-            FROM BOTTLENECKS b
-            JOIN VENDORS v ON ARRAY_CONTAINS(v.VENDOR_ID::VARIANT, b.DEPENDENT_NODES)
-            LEFT JOIN RISK_SCORES rs ON rs.NODE_ID = v.VENDOR_ID
-            WHERE b.NODE_ID = %s
-            ORDER BY rs.RISK_SCORE DESC NULLS LAST
-        """, (node_id,))
+_BOTTLENECKS_QUERY = """
+    SELECT 
+        BOTTLENECK_ID as bottleneck_id,
+        NODE_ID as node_id,
+        NODE_TYPE as node_type,
+        DEPENDENT_COUNT as dependent_count,
+        IMPACT_SCORE as impact_score,
+        DESCRIPTION as description,
+        MITIGATION_STATUS as mitigation_status
+    FROM BOTTLENECKS
+    ORDER BY IMPACT_SCORE DESC
+"""
 
-@router.get("/distribution")
-def get_risk_distribution():
-    with get_cursor() as cursor:
-        return query_to_dicts(cursor, """
-            SELECT 
-                RISK_CATEGORY as category,
-                COUNT(*) as count
-            FROM RISK_SCORES
-            GROUP BY RISK_CATEGORY
-            ORDER BY 
-                CASE RISK_CATEGORY 
-                    WHEN 'CRITICAL' THEN 1 
-                    WHEN 'HIGH' THEN 2 
-                    WHEN 'MEDIUM' THEN 3 
-                    WHEN 'LOW' THEN 4 
-                END
-        """)
+@router.get("/bottlenecks", dependencies=[Depends(http_cache("BOTTLENECKS"))])
+async def get_bottlenecks():
+    return await aquery_response(_BOTTLENECKS_QUERY)
+
+_DEPENDENTS_QUERY = """
+    SELECT DISTINCT
+        v.VENDOR_ID as vendor_id,
+        v.NAME as name,
+        v.COUNTRY_CODE as country_code,
+        v.CITY as city,
+        v.TIER as tier,
+        v.FINANCIAL_HEALTH_SCORE as financial_health_score,
+        rs.RISK_SCORE as risk_score,
+        rs.RISK_CATEGORY as risk_category
+    FROM VW_BOTTLENECK_DEPENDENTS bd
+    JOIN VENDORS v ON v.VENDOR_ID = bd.VENDOR_ID
+    LEFT JOIN RISK_SCORES rs ON rs.NODE_ID = v.VENDOR_ID
+    WHERE bd.NODE_ID = %s
+    ORDER BY rs.RISK_SCORE DESC NULLS LAST
+"""
+
+@router.get("/bottleneck/{node_id}/dependents", dependencies=[Depends(http_cache("BOTTLENECKS", "VENDORS", "RISK_SCORES"))])
+async def get_bottleneck_dependents(node_id: str):
+    return await aquery_response(_DEPENDENTS_QUERY, (node_id,))
+
+_DISTRIBUTION_QUERY = """
+    SELECT 
+        RISK_CATEGORY as category,
+        COUNT(*) as count
+    FROM RISK_SCORES
+    GROUP BY RISK_CATEGORY
+    ORDER BY 
+        CASE RISK_CATEGORY 
+            WHEN 'CRITICAL' THEN 1 
+            WHEN 'HIGH' THEN 2 
+            WHEN 'MEDIUM' THEN 3 
+            WHEN 'LOW' THEN 4 
+        END
+"""
+
+@router.get("/distribution", dependencies=[Depends(http_cache("RISK_SCORES"))])
+async def get_risk_distribution():
+    return await aquery_response(_DISTRIBUTION_QUERY)
@@ -1,11 +1,14 @@
+import { lazy } from 'react'
 import { BrowserRouter, Routes, Route } from 'react-router-dom'
 import { Layout } from './components/Layout'
 import { Home } from './pages/Home'
-import { Executive } from './pages/Executive'
-import { Network } from './pages/Network'
-import { Tier2Analysis } from './pages/Tier2Analysis'
-import { Simulator } from './pages/Simulator'
-import { Mitigation } from './pages/Mitigation'
+
+// Heavier pages (React Flow, Plotly) are split into their own chunks and loaded on first visit
+const Executive = lazy(() => import('./pages/Executive').then(m => ({ default: m.Executive })))
+const Network = lazy(() => import('./pages/Network').then(m => ({ default: m.Network })))
+const Tier2Analysis = lazy(() => import('./pages/Tier2Analysis').then(m => ({ default: m.Tier2Analysis })))
+const Simulator = lazy(() => import('./pages/Simulator').then(m => ({ default: m.Simulator })))
+const Mitigation = lazy(() => import('./pages/Mitigation').then(m => ({ default: m.Mitigation })))
 
 export default function App() {
   return (
@@ -3,7 +3,7 @@ import {
   Home, BarChart3, Network, Target, Zap, Shield, 
   ChevronLeft, ChevronRight, MessageSquare 
 } from 'lucide-react'
-import { useState } from 'react'
+import { Suspense, useState } from 'react'
 import { cn } from '../lib/utils'
 import { CortexConversation } from './chat/CortexConversation'
 
@@ -68,7 +68,9 @@ export function Layout() {
       </aside>
 
       <main className="flex-1 overflow-auto">
-        <Outlet />
+        <Suspense fallback={<div className="p-6 text-sm text-slate-500">Loading...</div>}>
+          <Outlet />
+        </Suspense>
       </main>
 
       <CortexConversation />
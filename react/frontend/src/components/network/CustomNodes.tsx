@@ -1,22 +1,20 @@
-import { memo, useState } from 'react'
+import { memo } from 'react'
 import { Handle, Position, NodeProps } from 'reactflow'
 import type { VendorNodeData, MaterialNodeData, RegionNodeData, ExternalNodeData } from '../../types/network'
 import { getRiskColor } from '../../lib/utils'
+import { categoryColor } from '../../styles/snowflake-theme'
 
 export const VendorNode = memo(({ data }: NodeProps<VendorNodeData>) => {
-  const [showFull, setShowFull] = useState(false)
-  const borderColor = getRiskColor(data.risk_score)
+  const borderColor = categoryColor(data.risk_category)
 
   return (
     <div
-      className="px-2 py-1.5 rounded-full bg-slate-800 border-2 text-center cursor-pointer transition-all hover:z-50"
-      style={{ borderColor, minWidth: showFull ? 'auto' : '70px' }}
-      onMouseEnter={() => setShowFull(true)}
-      onMouseLeave={() => setShowFull(false)}
+      className="group px-2 py-1.5 rounded-full bg-slate-800 border-2 text-center cursor-pointer hover:z-50 min-w-[70px] hover:min-w-0"
+      style={{ borderColor }}
     >
       <Handle type="target" position={Position.Top} className="!bg-slate-500 !w-2 !h-2" />
       <div
-        className={`text-[10px] font-medium text-slate-200 ${showFull ? '' : 'truncate max-w-[60px]'}`}
+        className="text-[10px] font-medium text-slate-200 truncate max-w-[60px] group-hover:max-w-none"
         title={data.label}
       >
         {data.label}
@@ -31,18 +29,11 @@ export const VendorNode = memo(({ data }: NodeProps<VendorNodeData>) => {
 })
 
 export const MaterialNode = memo(({ data }: NodeProps<MaterialNodeData>) => {
-  const [showFull, setShowFull] = useState(false)
-
   return (
-    <div
-      className="px-2 py-1.5 bg-purple-900/50 border-2 border-purple-500 rounded-lg text-center cursor-pointer transition-all hover:z-50"
-      style={{ minWidth: showFull ? 'auto' : '70px' }}
-      onMouseEnter={() => setShowFull(true)}
-      onMouseLeave={() => setShowFull(false)}
-    >
+    <div className="group px-2 py-1.5 bg-purple-900/50 border-2 border-purple-500 rounded-lg text-center cursor-pointer hover:z-50 min-w-[70px] hover:min-w-0">
       <Handle type="target" position={Position.Top} className="!bg-purple-500 !w-2 !h-2" />
       <div
-        className={`text-[10px] font-medium text-purple-200 ${showFull ? '' : 'truncate max-w-[60px]'}`}
+        className="text-[10px] font-medium text-purple-200 truncate max-w-[60px] group-hover:max-w-none"
         title={data.label}
       >
         {data.label}
@@ -72,20 +63,17 @@ export const RegionNode = memo(({ data }: NodeProps<RegionNodeData>) => {
 })
 
 export const ExternalNode = memo(({ data }: NodeProps<ExternalNodeData>) => {
-  const [showFull, setShowFull] = useState(false)
   const borderColor = data.is_bottleneck ? '#dc2626' : getRiskColor(data.risk_score)
 
   return (
     <div
-      className="px-2 py-1.5 bg-amber-900/30 border-2 text-center cursor-pointer transition-all hover:z-50"
+      className="group px-2 py-1.5 bg-amber-900/30 border-2 text-center cursor-pointer hover:z-50"
       style={{ borderColor, minWidth: '60px', transform: 'rotate(45deg)' }}
-      onMouseEnter={() => setShowFull(true)}
-      onMouseLeave={() => setShowFull(false)}
     >
       <Handle type="target" position={Position.Top} className="!bg-amber-500 !w-2 !h-2" style={{ transform: 'rotate(-45deg)' }} />
       <div style={{ transform: 'rotate(-45deg)' }}>
         <div
-          className={`text-[10px] font-medium text-amber-200 ${showFull ? '' : 'truncate max-w-[50px]'}`}
+          className="text-[10px] font-medium text-amber-200 truncate max-w-[50px] group-hover:max-w-none"
           title={data.label}
         >
           {data.label}
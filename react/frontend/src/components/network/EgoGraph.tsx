@@ -1,9 +1,17 @@
-import ReactFlow, { Background, Controls, MiniMap } from 'reactflow'
+import ReactFlow, { Background, Controls, MiniMap, Node } from 'reactflow'
 import 'reactflow/dist/style.css'
 import { nodeTypes } from './CustomNodes'
 import { edgeTypes } from './CustomEdges'
 import type { NetworkGraphData } from '../../types/network'
 
+const FIT_VIEW_OPTIONS = { padding: 0.3 }
+
+const minimapNodeColor = (node: Node) => {
+  if (node.type === 'external') return '#ef4444'
+  if (node.type === 'vendor') return '#38bdf8'
+  return '#94a3b8'
+}
+
 interface EgoGraphProps {
   data: NetworkGraphData
   title?: string
@@ -28,7 +36,7 @@ export function EgoGraph({ data, title }: EgoGraphProps) {
           nodeTypes={nodeTypes}
           edgeTypes={edgeTypes}
           fitView
-          fitViewOptions={{ padding: 0.3 }}
+          fitViewOptions={FIT_VIEW_OPTIONS}
           minZoom={0.2}
           maxZoom={1.5}
           nodesDraggable={true}
@@ -42,11 +50,7 @@ export function EgoGraph({ data, title }: EgoGraphProps) {
           />
           {showMiniMap && (
             <MiniMap 
-              nodeColor={(node) => {
-                if (node.type === 'external') return '#ef4444'
-                if (node.type === 'vendor') return '#38bdf8'
-                return '#94a3b8'
-              }}
+              nodeColor={minimapNodeColor}
               maskColor="rgba(15, 23, 42, 0.8)"
               className="!bg-slate-800 !border-slate-700"
             />
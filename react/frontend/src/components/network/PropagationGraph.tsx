@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback, useMemo } from 'react'
+import { useState, useEffect, useCallback, useMemo, useRef } from 'react'
 import ReactFlow, { Background, Controls, MiniMap, Node, Edge, useReactFlow, ReactFlowProvider } from 'reactflow'
 import 'reactflow/dist/style.css'
 import { nodeTypes } from './CustomNodes'
@@ -10,11 +10,37 @@ interface PropagationGraphProps {
 }
 
 const ANIMATION_DURATION = 2500
+// Per-node transitions and animated edges repaint every element each frame; skip them on large graphs
+const ANIMATE_MAX_NODES = 300
+const FIT_VIEW_OPTIONS = { padding: 0.2, minZoom: 0.1, maxZoom: 0.8 }
+
+const minimapNodeColor = (node: Node) => {
+  const step = (node.data as any).propagation_step
+  if ((node.data as any).is_source) return '#dc2626'
+  if (step === 0) return '#ef4444'
+  if (step === 1) return '#eab308'
+  if (step === 2) return '#22c55e'
+  return '#94a3b8'
+}
+
+type StyleCache<T> = Map<string, { key: string; value: T }>
+
+// Returns the previous styled object for an id while its look is unchanged, so React Flow only re-renders what changed
+function reuseById<T>(cache: StyleCache<T>, id: string, key: string, build: () => T): T {
+  const hit = cache.get(id)
+  if (hit && hit.key === key) return hit.value
+  const value = build()
+  cache.set(id, { key, value })
+  return value
+}
 
 function PropagationGraphInner({ data }: PropagationGraphProps) {
   const [currentStep, setCurrentStep] = useState(0)
   const [isPlaying, setIsPlaying] = useState(true)
   const { fitView } = useReactFlow()
+  const containerRef = useRef<HTMLDivElement>(null)
+  const [pageVisible, setPageVisible] = useState(!document.hidden)
+  const [onScreen, setOnScreen] = useState(true)
   
   const maxStep = data.propagation_steps.length - 1
   
@@ -23,8 +49,22 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
     setIsPlaying(true)
   }, [data.region])
   
+  // Auto-play pauses while the tab is hidden or the graph is scrolled out of view
+  useEffect(() => {
+    const onVisibilityChange = () => setPageVisible(!document.hidden)
+    document.addEventListener('visibilitychange', onVisibilityChange)
+    return () => document.removeEventListener('visibilitychange', onVisibilityChange)
+  }, [])
+  
   useEffect(() => {
-    if (!isPlaying) return
+    if (!containerRef.current) return
+    const observer = new IntersectionObserver(([entry]) => setOnScreen(entry.isIntersecting))
+    observer.observe(containerRef.current)
+    return () => observer.disconnect()
+  }, [])
+  
+  useEffect(() => {
+    if (!isPlaying || !pageVisible || !onScreen) return
     
     const timer = setTimeout(() => {
       setCurrentStep((prev) => {
@@ -36,7 +76,7 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
     }, ANIMATION_DURATION)
     
     return () => clearTimeout(timer)
-  }, [currentStep, isPlaying, maxStep])
+  }, [currentStep, isPlaying, pageVisible, onScreen, maxStep])
   
   const handlePlayPause = useCallback(() => {
     setIsPlaying((prev) => !prev)
@@ -82,45 +122,49 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
     return { visibleNodes: nodes, visibleEdges: edges }
   }, [data, currentStep])
   
+  const animate = visibleNodes.length < ANIMATE_MAX_NODES
+  const nodeCache = useMemo<StyleCache<Node>>(() => new Map(), [data])
+  const edgeCache = useMemo<StyleCache<Edge>>(() => new Map(), [data])
+  
   const styledNodes: Node[] = useMemo(() => {
     return visibleNodes.map((node) => {
       const nodeStep = (node.data as any).propagation_step ?? -1
       const isCurrentStep = nodeStep === currentStep
       const isSource = (node.data as any).is_source
       
-      return {
+      return reuseById(nodeCache, node.id, `${isCurrentStep || isSource}:${animate}`, () => ({
         ...node,
         style: {
           ...node.style,
           opacity: 1,
-          transition: 'all 0.3s ease-out'
+          transition: animate ? 'all 0.3s ease-out' : undefined
         },
-        className: isCurrentStep || isSource ? 'scale-110' : '',
+        className: animate && (isCurrentStep || isSource) ? 'scale-110' : '',
         data: {
           ...node.data,
           highlighted: isCurrentStep || isSource
         }
-      }
-    }) as Node[]
-  }, [visibleNodes, currentStep])
+      }) as Node)
+    })
+  }, [visibleNodes, currentStep, animate, nodeCache])
   
   const styledEdges: Edge[] = useMemo(() => {
     return visibleEdges.map((edge) => {
       const edgeStep = edge.data?.step ?? -1
       const isCurrentStep = edgeStep === currentStep
       
-      return {
+      return reuseById(edgeCache, edge.id, `${isCurrentStep}:${animate}`, () => ({
         ...edge,
         type: 'default',
-        animated: isCurrentStep,
+        animated: animate && isCurrentStep,
         style: {
           stroke: isCurrentStep ? '#f97316' : edgeStep === 0 ? '#ef4444' : edgeStep === 1 ? '#eab308' : '#22c55e',
           strokeWidth: isCurrentStep ? 3 : 2,
           opacity: 1
         }
-      }
-    }) as Edge[]
-  }, [visibleEdges, currentStep])
+      }) as Edge)
+    })
+  }, [visibleEdges, currentStep, animate, edgeCache])
   
   useEffect(() => {
     if (styledNodes.length > 0) {
@@ -134,7 +178,7 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
   const currentStepInfo = data.propagation_steps[currentStep]
   
   return (
-    <div className="bg-slate-800/50 border border-slate-700 rounded-lg overflow-hidden">
+    <div ref={containerRef} className="bg-slate-800/50 border border-slate-700 rounded-lg overflow-hidden">
       <div className="px-4 py-3 border-b border-slate-700">
         <div className="flex items-center justify-between mb-3">
           <h3 className="text-sm font-medium text-slate-300">Disruption Propagation</h3>
@@ -192,7 +236,7 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
           edges={styledEdges}
           nodeTypes={nodeTypes}
           fitView
-          fitViewOptions={{ padding: 0.2, minZoom: 0.1, maxZoom: 0.8 }}
+          fitViewOptions={FIT_VIEW_OPTIONS}
           minZoom={0.05}
           maxZoom={2}
           nodesDraggable={true}
@@ -200,7 +244,7 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
           elementsSelectable={true}
           onInit={(instance) => {
             setTimeout(() => {
-              instance.fitView({ padding: 0.2, minZoom: 0.1, maxZoom: 0.8 })
+              instance.fitView(FIT_VIEW_OPTIONS)
             }, 200)
           }}
         >
@@ -210,14 +254,7 @@ function PropagationGraphInner({ data }: PropagationGraphProps) {
             className="!bg-slate-800 !border-slate-700 !rounded-lg [&>button]:!bg-slate-700 [&>button]:!border-slate-600 [&>button]:!text-slate-300" 
           />
           <MiniMap 
-            nodeColor={(node) => {
-              const step = (node.data as any).propagation_step
-              if ((node.data as any).is_source) return '#dc2626'
-              if (step === 0) return '#ef4444'
-              if (step === 1) return '#eab308'
-              if (step === 2) return '#22c55e'
-              return '#94a3b8'
-            }}
+            nodeColor={minimapNodeColor}
             maskColor="rgba(15, 23, 42, 0.8)"
             className="!bg-slate-800 !border-slate-700"
           />
@@ -20,11 +20,28 @@ interface SupplyNetworkGraphProps {
 
 type LayoutType = 'hierarchical' | 'radial' | 'grouped'
 
+// Static React Flow props live outside the component so every render passes the same references
+const FIT_VIEW_OPTIONS = { padding: 0.2 }
+const DEFAULT_EDGE_OPTIONS = { style: { strokeWidth: 1, opacity: 0.6 } }
+const MINIMAP_COLORS: Record<string, string> = {
+  vendor: '#29B5E8',
+  material: '#8b5cf6',
+  region: '#64748b',
+  external: '#f59e0b',
+}
+const minimapNodeColor = (node: Node) => MINIMAP_COLORS[node.type || ''] ?? '#475569'
+// The MiniMap draws every node again as SVG, so it is dropped for very large graphs
+const MINIMAP_MAX_NODES = 2000
+
+// Buckets nodes by type in one pass instead of filtering the full list once per type
+function groupByType(nodes: Node[]): Record<string, Node[]> {
+  const groups: Record<string, Node[]> = { vendor: [], material: [], region: [], external: [] }
+  nodes.forEach(n => groups[n.type || '']?.push(n))
+  return groups
+}
+
 function hierarchicalLayout(nodes: Node[], edges: Edge[]): Node[] {
-  const vendorNodes = nodes.filter(n => n.type === 'vendor')
-  const materialNodes = nodes.filter(n => n.type === 'material')
-  const regionNodes = nodes.filter(n => n.type === 'region')
-  const externalNodes = nodes.filter(n => n.type === 'external')
+  const { vendor: vendorNodes, material: materialNodes, region: regionNodes, external: externalNodes } = groupByType(nodes)
 
   const nodeSpacingX = 180
   const nodeSpacingY = 160
@@ -37,10 +54,11 @@ function hierarchicalLayout(nodes: Node[], edges: Edge[]): Node[] {
     }
   })
 
+  const nodeById = new Map<string, Node>(nodes.map(n => [n.id, n]))
   const regionMap = new Map<string, string[]>()
   edges.forEach(edge => {
-    const sourceNode = nodes.find(n => n.id === edge.source)
-    const targetNode = nodes.find(n => n.id === edge.target)
+    const sourceNode = nodeById.get(edge.source)
+    const targetNode = nodeById.get(edge.target)
     if (sourceNode?.type === 'region' && targetNode?.type === 'vendor') {
       if (!regionMap.has(edge.source)) regionMap.set(edge.source, [])
       regionMap.get(edge.source)!.push(edge.target)
@@ -58,8 +76,8 @@ function hierarchicalLayout(nodes: Node[], edges: Edge[]): Node[] {
   regionNodes.forEach((regionNode, regionIdx) => {
     const regionVendors = regionMap.get(regionNode.id) || []
     regionVendors.forEach((vendorId, i) => {
-      const vendor = vendorNodes.find(n => n.id === vendorId)
-      if (vendor && !assignedVendors.has(vendorId)) {
+      const vendor = nodeById.get(vendorId)
+      if (vendor?.type === 'vendor' && !assignedVendors.has(vendorId)) {
         vendor.position = {
           x: regionNode.position.x + (i - regionVendors.length / 2) * 100,
           y: vendorY + (i % 3) * 80
@@ -96,10 +114,7 @@ function hierarchicalLayout(nodes: Node[], edges: Edge[]): Node[] {
 }
 
 function radialLayout(nodes: Node[]): Node[] {
-  const vendorNodes = nodes.filter(n => n.type === 'vendor')
-  const materialNodes = nodes.filter(n => n.type === 'material')
-  const regionNodes = nodes.filter(n => n.type === 'region')
-  const externalNodes = nodes.filter(n => n.type === 'external')
+  const { vendor: vendorNodes, material: materialNodes, region: regionNodes, external: externalNodes } = groupByType(nodes)
 
   const centerX = 1200
   const centerY = 800
@@ -144,10 +159,7 @@ function radialLayout(nodes: Node[]): Node[] {
 }
 
 function groupedLayout(nodes: Node[]): Node[] {
-  const vendorNodes = nodes.filter(n => n.type === 'vendor')
-  const materialNodes = nodes.filter(n => n.type === 'material')
-  const regionNodes = nodes.filter(n => n.type === 'region')
-  const externalNodes = nodes.filter(n => n.type === 'external')
+  const { vendor: vendorNodes, material: materialNodes, region: regionNodes, external: externalNodes } = groupByType(nodes)
 
   const groupSpacing = 400
   const nodeSpacing = 120
@@ -197,7 +209,8 @@ function groupedLayout(nodes: Node[]): Node[] {
 }
 
 function layoutNodes(nodes: Node[], edges: Edge[], layoutType: LayoutType): Node[] {
-  const clonedNodes = nodes.map(n => ({ ...n, position: { ...n.position } }))
+  // Layouts assign a fresh position object rather than mutating it, so a shallow node copy is enough
+  const clonedNodes = nodes.map(n => ({ ...n }))
   
   switch (layoutType) {
     case 'hierarchical':
@@ -218,13 +231,10 @@ export function SupplyNetworkGraph({ data, onNodeClick }: SupplyNetworkGraphProp
 
   const filteredData = useMemo(() => {
     if (!filterType) return data
+    const typeById = new Map<string, string | undefined>(data.nodes.map(n => [n.id, n.type]))
     return {
       nodes: data.nodes.filter(n => n.type === filterType),
-      edges: data.edges.filter(e => {
-        const sourceNode = data.nodes.find(n => n.id === e.source)
-        const targetNode = data.nodes.find(n => n.id === e.target)
-        return sourceNode?.type === filterType || targetNode?.type === filterType
-      })
+      edges: data.edges.filter(e => typeById.get(e.source) === filterType || typeById.get(e.target) === filterType)
     }
   }, [data, filterType])
 
@@ -322,30 +332,23 @@ export function SupplyNetworkGraph({ data, onNodeClick }: SupplyNetworkGraphProp
           nodeTypes={nodeTypes}
           edgeTypes={edgeTypes}
           fitView
-          fitViewOptions={{ padding: 0.2 }}
+          fitViewOptions={FIT_VIEW_OPTIONS}
           minZoom={0.1}
           maxZoom={2}
-          defaultEdgeOptions={{
-            style: { strokeWidth: 1, opacity: 0.6 }
-          }}
+          onlyRenderVisibleElements
+          defaultEdgeOptions={DEFAULT_EDGE_OPTIONS}
         >
           <Background color="#334155" gap={20} />
           <Controls className="!bg-slate-800 !border-slate-700 !rounded-lg [&>button]:!bg-slate-700 [&>button]:!border-slate-600 [&>button]:!text-slate-300" />
-          <MiniMap
-            nodeColor={(node) => {
-              switch (node.type) {
-                case 'vendor': return '#29B5E8'
-                case 'material': return '#8b5cf6'
-                case 'region': return '#64748b'
-                case 'external': return '#f59e0b'
-                default: return '#475569'
-              }
-            }}
-            maskColor="rgba(15, 23, 42, 0.8)"
-            className="!bg-slate-800 !border-slate-700"
-            pannable
-            zoomable
-          />
+          {nodes.length <= MINIMAP_MAX_NODES && (
+            <MiniMap
+              nodeColor={minimapNodeColor}
+              maskColor="rgba(15, 23, 42, 0.8)"
+              className="!bg-slate-800 !border-slate-700"
+              pannable
+              zoomable
+            />
+          )}
         </ReactFlow>
       </div>
     </div>
@@ -31,6 +31,10 @@ export const riskColor = (score: number): string => {
   return theme.colors.risk.low
 }
 
+// Uses the category scored server-side so node colors always agree with the risk badge
+export const categoryColor = (category: string): string =>
+  theme.colors.risk[category.toLowerCase() as keyof typeof theme.colors.risk] ?? theme.colors.risk.medium
+
 export const riskCategory = (score: number): string => {
   if (score >= 0.7) return 'CRITICAL'
   if (score >= 0.5) return 'HIGH'
@@ -2,7 +2,6 @@ import type { Node, Edge } from 'reactflow'
 
 export interface VendorNodeData {
   label: string
-  vendor_id: string
   risk_score: number
   risk_category: string
   country: string
@@ -12,14 +11,12 @@ export interface VendorNodeData {
 
 export interface MaterialNodeData {
   label: string
-  material_id: string
   criticality: number
   propagation_step?: number
 }
 
 export interface RegionNodeData {
   label: string
-  region_code: string
   base_risk: number
   vendor_count: number
   is_source?: boolean
@@ -27,7 +24,6 @@ export interface RegionNodeData {
 
 export interface ExternalNodeData {
   label: string
-  node_id: string
   risk_score: number
   is_bottleneck: boolean
 }
@@ -39,7 +35,6 @@ export type SupplyChainNode =
   | Node<ExternalNodeData, 'external'>
 
 export interface SupplyChainEdgeData {
-  edge_type: 'supplies' | 'located_in' | 'ships_to' | 'predicted' | 'propagation'
   probability?: number
   step?: number
 }
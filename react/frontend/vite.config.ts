@@ -3,6 +3,18 @@ import react from '@vitejs/plugin-react'
 
 export default defineConfig({
   plugins: [react()],
+  build: {
+    rollupOptions: {
+      output: {
+        // Large third-party libraries get their own long-lived chunks, so app releases don't invalidate them
+        manualChunks: {
+          plotly: ['plotly.js-dist-min', 'react-plotly.js'],
+          reactflow: ['reactflow'],
+          markdown: ['react-markdown'],
+        },
+      },
+    },
+  },
   server: {
     port: 5173,
     proxy: {
@@ -249,6 +249,37 @@ LEFT JOIN VENDORS v2 ON pl.TARGET_NODE_ID = v2.VENDOR_ID
 WHERE pl.PROBABILITY >= 0.5
 ORDER BY pl.PROBABILITY DESC;
 
+-- Bottleneck Dependents
+-- One row per (bottleneck, dependent vendor). DEPENDENT_NODES holds either
+-- vendor IDs or a single serialized list of them, so both shapes are unwrapped.
+CREATE OR REPLACE VIEW VW_BOTTLENECK_DEPENDENTS AS
+SELECT DISTINCT
+    b.NODE_ID,
+    COALESCE(ids.VALUE, deps.VALUE)::VARCHAR AS VENDOR_ID
+FROM BOTTLENECKS b,
+    LATERAL FLATTEN(input => b.DEPENDENT_NODES) deps,
+    LATERAL FLATTEN(
+        input => IFF(IS_ARRAY(TRY_PARSE_JSON(deps.VALUE::VARCHAR)), TRY_PARSE_JSON(deps.VALUE::VARCHAR), ARRAY_CONSTRUCT()),
+        OUTER => TRUE
+    ) ids;
+
+-- Regional Risk Rollup for Executive Dashboard
+-- A plain view: Snowflake materialized views cannot contain joins.
+CREATE OR REPLACE VIEW VW_REGIONAL_RISK AS
+SELECT 
+    v.COUNTRY_CODE,
+    COALESCE(r.REGION_NAME, v.COUNTRY_CODE) AS REGION_NAME,
+    COUNT(DISTINCT v.VENDOR_ID) AS VENDOR_COUNT,
+    ROUND(AVG(rs.RISK_SCORE), 3) AS AVG_RISK,
+    ROUND(AVG(v.FINANCIAL_HEALTH_SCORE), 3) AS AVG_HEALTH,
+    r.GEOPOLITICAL_RISK,
+    r.NATURAL_DISASTER_RISK,
+    SUM(CASE WHEN rs.RISK_CATEGORY IN ('CRITICAL', 'HIGH') THEN 1 ELSE 0 END) AS HIGH_RISK_COUNT
+FROM VENDORS v
+LEFT JOIN REGIONS r ON v.COUNTRY_CODE = r.REGION_CODE
+LEFT JOIN RISK_SCORES rs ON v.VENDOR_ID = rs.NODE_ID
+GROUP BY v.COUNTRY_CODE, r.REGION_NAME, r.GEOPOLITICAL_RISK, r.NATURAL_DISASTER_RISK;
+
 -- High Risk Summary for Executive Dashboard
 CREATE OR REPLACE VIEW VW_RISK_SUMMARY AS
 SELECT 
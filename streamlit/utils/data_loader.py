@@ -6,11 +6,18 @@ to significantly reduce dashboard load times when multiple independent
 queries need to be executed.
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+try:
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:  # streamlit < 1.38
+    from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
 import logging
+import threading
 import time
-from typing import Dict, Any
+from typing import Any, Callable, Dict
 
 # Database/schema prefix for fully qualified table names
 # Used across all Streamlit pages for consistent table references
@@ -20,6 +27,67 @@ DB_SCHEMA = "GNN_SUPPLY_CHAIN_RISK.GNN_SUPPLY_CHAIN_RISK"
 logger = logging.getLogger(__name__)
 
 
+# Width of the per-session pool that page loaders are submitted to
+LOADER_POOL_WORKERS = 4
+
+# Loader threads may request a session's pool at the same time; only one may create it
+_executor_lock = threading.Lock()
+
+
+def _session_executor(key: str, max_workers: int, thread_name_prefix: str) -> ThreadPoolExecutor:
+    """Return the thread pool stored under key in this session, creating it on first use."""
+    with _executor_lock:
+        executor = st.session_state.get(key)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+            st.session_state[key] = executor
+    return executor
+
+
+def get_query_executor(max_workers: int = 8) -> ThreadPoolExecutor:
+    """
+    Return this session's thread pool for query fan-out, one per pool width.
+    
+    Kept in st.session_state so reruns and page switches reuse the same worker
+    threads, while concurrent users never queue behind each other's queries.
+    The pool is not shut down explicitly; its idle threads exit once the
+    session state holding it is discarded.
+    """
+    return _session_executor(f"_query_executor_{max_workers}", max_workers, "sf-query")
+
+
+def get_loader_executor() -> ThreadPoolExecutor:
+    """
+    Return this session's thread pool for page-level loaders.
+    
+    Separate from get_query_executor so a loader that calls
+    run_queries_parallel never waits on a pool its own task is occupying.
+    """
+    return _session_executor("_loader_executor", LOADER_POOL_WORKERS, "page-loader")
+
+
+def submit_with_context(fn: Callable, *args) -> Future:
+    """
+    Submit fn(*args) to this session's loader pool with the caller's script context.
+    
+    The ScriptRunContext is attached for the duration of the task only, so
+    st.cache_data loaders run on the pool without "missing ScriptRunContext"
+    warnings and the worker thread does not keep the caller's context afterwards.
+    """
+    ctx = get_script_run_ctx()
+    
+    def run_with_context():
+        thread = threading.current_thread()
+        previous_ctx = get_script_run_ctx(suppress_warning=True)
+        add_script_run_ctx(thread, ctx)
+        try:
+            return fn(*args)
+        finally:
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous_ctx)
+    
+    return get_loader_executor().submit(run_with_context)
+
+
 def run_queries_parallel(
     session,
     queries: Dict[str, str],
@@ -64,6 +132,7 @@ def run_queries_parallel(
     Thread Safety:
         Snowflake Snowpark sessions support concurrent cursor execution.
         Each thread gets its own cursor from the session's connection.
+        Threads come from this session's pool returned by get_query_executor().
     """
     
     if not queries:
@@ -88,26 +157,27 @@ def run_queries_parallel(
             else:
                 raise
     
-    # Execute queries in parallel
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all queries
-        future_to_name = {
-            executor.submit(execute_query, name, query): name
-            for name, query in queries.items()
-        }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_name):
-            name = future_to_name[future]
-            try:
-                query_name, result_df = future.result()
-                results[query_name] = result_df
-            except Exception as e:
-                logger.error(f"Failed to get result for '{name}': {e}")
-                if return_empty_on_error:
-                    results[name] = pd.DataFrame()
-                else:
-                    raise
+    # Execute queries in parallel on this session's pool
+    executor = get_query_executor(max_workers)
+    
+    # Submit all queries
+    future_to_name = {
+        executor.submit(execute_query, name, query): name
+        for name, query in queries.items()
+    }
+    
+    # Collect results as they complete
+    for future in as_completed(future_to_name):
+        name = future_to_name[future]
+        try:
+            query_name, result_df = future.result()
+            results[query_name] = result_df
+        except Exception as e:
+            logger.error(f"Failed to get result for '{name}': {e}")
+            if return_empty_on_error:
+                results[name] = pd.DataFrame()
+            else:
+                raise
     
     total_elapsed = time.time() - start_time
     logger.info(f"Parallel query execution completed in {total_elapsed:.2f}s for {len(queries)} queries")
@@ -0,0 +1,18 @@
+"""
+Page stylesheet loading for the Supply Chain Risk application.
+
+Stylesheets live in assets/ and are read from disk once per server process,
+so reruns reuse the same <style> string instead of re-reading the file.
+"""
+
+from pathlib import Path
+
+import streamlit as st
+
+ASSETS_DIR = Path(__file__).parent.parent / "assets"
+
+
+@st.cache_resource
+def load_css(filename: str) -> str:
+    """Return an assets/ stylesheet wrapped in a <style> tag."""
+    return f"<style>{(ASSETS_DIR / filename).read_text()}</style>"